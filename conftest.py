@@ -0,0 +1 @@
+# Makes the repository root importable (`import main`) when running pytest
@@ -1,14 +1,29 @@
+import asyncio
+import hashlib
 import json
+import logging
 import os
+import re
+import threading
 import time
+from contextlib import asynccontextmanager, suppress
 from copy import deepcopy
-from dataclasses import dataclass, asdict
-from fnmatch import fnmatch
-from typing import Any, Dict, List, Optional, Tuple
-
+from dataclasses import dataclass, field, fields
+from enum import IntEnum
+from fnmatch import translate
+from functools import lru_cache
+from heapq import merge
+from itertools import islice
+from operator import attrgetter
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional, Set, Tuple
+
+import fastjsonschema
+import orjson
 from fastapi import FastAPI, Query, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from jsonschema import Draft202012Validator
+from pydantic import BaseModel, Field
 
 # -----------------------
 # Config & setup
@@ -17,64 +32,316 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 SCHEMA_DIR = os.path.join(os.path.dirname(__file__), 'schemas')
 STORE_PATH = os.path.join(DATA_DIR, 'config_store.json')
 REGISTRY_PATH = os.path.join(SCHEMA_DIR, 'registry.json')
+FLUSH_INTERVAL = 0.25  # seconds between background store flushes
+MAX_VALIDATION_ERRORS = 20  # per rejected upsert
 
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(SCHEMA_DIR, exist_ok=True)
 
-app = FastAPI(title="Mn Config Dev Backend", version="1.0.0", description="Development-only backend that stores and serves runtime component configurations for Angular apps.")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Mutations only mark the store dirty; write it in the background and once more on shutdown
+    flusher = asyncio.create_task(flush_periodically())
+    try:
+        yield
+    finally:
+        flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await flusher
+        try:
+            await asyncio.to_thread(flush_store)
+        except Exception:
+            logger.exception('Final store flush failed')
+
+
+# ORJSONResponse needs every served value to be orjson-encodable: upsert_component rejects values
+# that are not, and load_registry parses defaults with orjson so they are too
+app = FastAPI(title="Mn Config Dev Backend", version="1.0.0", description="Development-only backend that stores and serves runtime component configurations for Angular apps.", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # dev only; tighten in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # No credentials and explicit lists: the middleware can send a static '*' instead of echoing request headers
+    allow_credentials=False,
+    allow_methods=["GET", "PUT", "DELETE"],
+    allow_headers=["content-type"],
 )
 
 # -----------------------
 # Types
 # -----------------------
-@dataclass
+class ScopeType(IntEnum):
+    # Values double as precedence: global < page (exact) < route < page-instance (most specific)
+    GLOBAL = 0
+    PAGE = 1
+    ROUTE = 2
+    PAGE_INSTANCE = 3
+
+    @property
+    def wire(self) -> str:
+        # 'global' | 'route' | 'page' | 'page-instance', as used by the API and the store file
+        return self.name.lower().replace('_', '-')
+
+    @classmethod
+    def from_wire(cls, value: str) -> 'ScopeType':
+        try:
+            return cls[value.upper().replace('-', '_')]
+        except (AttributeError, KeyError):
+            raise ValueError(f'Unknown scopeType {value!r}') from None
+
+
+@dataclass(slots=True)
 class ConfigDoc:
     tenant: str
     env: str
     componentKey: str
-    scopeType: str  # 'global' | 'route' | 'page' | 'page-instance'
+    scopeType: ScopeType
     scopeKey: str   # '*' or route pattern like '/products/*' or page id or '<page>#<instance>'
     version: int
     value: Dict[str, Any]
     createdAt: float
     createdBy: str  # dev string
+    _specificity: Tuple[int, int] = field(init=False, repr=False, compare=False)  # derived; see scope_specificity
+    # Docs are never modified after creation, so their wire form is built once; shared, do not mutate
+    _serialized: Dict[str, Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._specificity = scope_specificity(self.scopeType, self.scopeKey)
+        self._serialized = doc_to_dict(self)
+
+
+def scope_specificity(scope_type: ScopeType, scope_key: str) -> Tuple[int, int]:
+    # Scope type first, then key length (a longer route pattern is more specific)
+    return (scope_type.value, len(scope_key))
+
+
+_DOC_FIELDS = tuple(f.name for f in fields(ConfigDoc) if f.init)
+
+
+def doc_to_dict(doc: ConfigDoc) -> Dict[str, Any]:
+    # Shallow on purpose: unlike asdict, `value` is not deep-copied (the doc owns it)
+    out = {name: getattr(doc, name) for name in _DOC_FIELDS}
+    out['scopeType'] = doc.scopeType.wire
+    return out
+
+
+def doc_from_dict(item: Dict[str, Any]) -> ConfigDoc:
+    return ConfigDoc(**{**item, 'scopeType': ScopeType.from_wire(item['scopeType'])})
+
+
+class TenantEnvQuery(BaseModel):
+    tenant: str = Field('default', description='Tenant key')
+    env: str = Field('dev', description='Environment key')
+
+
+class EffectiveQuery(TenantEnvQuery):
+    route: Optional[str] = Field(None, description='Optional current URL path')
+    page: Optional[str] = Field(None, description='Optional page id')
+    instance: Optional[str] = Field(None, description='Optional instance id for the given page (page-instance scope)')
+
+
+class UpsertBody(BaseModel):
+    tenant: Optional[str] = Field(None, description='Tenant key; overrides the tenant_q query param')
+    env: Optional[str] = Field(None, description='Environment key; overrides the env_q query param')
+    scopeType: Literal['global', 'route', 'page', 'page-instance'] = 'global'
+    scopeKey: str = Field('*', description="'*' or route pattern like '/products/*' or page id or '<page>#<instance>'")
+    value: Dict[str, Any] = Field(default_factory=dict)
+    updatedBy: str = 'dev'
+
+
+def route_literal_prefix(pattern: str) -> List[str]:
+    # Leading '/'-separated segments of a route pattern that contain no wildcard characters
+    prefix: List[str] = []
+    for segment in pattern.split('/'):
+        if any(c in segment for c in '*?['):
+            break
+        prefix.append(segment)
+    return prefix
+
+
+class PathTrie:
+    """Route scope docs indexed by the literal path segments their pattern starts with.
+
+    A route can only match patterns whose literal prefix lies on its own segment path, so lookup
+    walks that path instead of testing every pattern. Docs found deeper have a longer literal
+    prefix, are more specific, and come later in the result (merged last).
+    """
+
+    __slots__ = ('children', 'docs')
+
+    def __init__(self):
+        self.children: Dict[str, PathTrie] = {}
+        self.docs: List[ConfigDoc] = []  # one doc per scopeKey, in specificity order
+
+    def insert(self, doc: ConfigDoc):
+        node = self
+        for segment in route_literal_prefix(doc.scopeKey):
+            node = node.children.setdefault(segment, PathTrie())
+        docs = [d for d in node.docs if d.scopeKey != doc.scopeKey]
+        docs.append(doc)
+        docs.sort(key=attrgetter('_specificity'))
+        node.docs = docs
+
+    def lookup(self, route: str) -> List[ConfigDoc]:
+        node = self
+        matches = [d for d in node.docs if match_route(d.scopeKey, route)]
+        for segment in route.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            matches.extend(d for d in node.docs if match_route(d.scopeKey, route))
+        return matches
 
 # -----------------------
 # In-memory store + file persistence
 # -----------------------
-_store: List[ConfigDoc] = []
+Identity = Tuple[str, str, str]  # (tenant, env, componentKey)
+
+_by_identity: Dict[Identity, List[ConfigDoc]] = {}  # every version, in insertion order
+_latest: Dict[Identity, Dict[Tuple[ScopeType, str], ConfigDoc]] = {}  # (scopeType, scopeKey) -> latest version
+_components_by_te: Dict[Tuple[str, str], Set[str]] = {}  # (tenant, env) -> component keys with docs
+_route_trie: Dict[Identity, PathTrie] = {}  # latest route-scope docs per identity
+# Stored docs whose scopeType is not a ScopeType (older versions accepted any string). They never
+# matched a scope, so they are not indexed, but are written back verbatim so saving does not drop them.
+_unrecognized: List[Dict[str, Any]] = []
+_dirty = False  # store has changes not yet written to STORE_PATH
+_flush_lock = threading.Lock()
+_store_gen = 0  # bumped on every store/registry change; part of the effective-config cache key
 _registry: Dict[str, Dict[str, Any]] = {}
+_registry_keys_sorted: Tuple[str, ...] = ()
+_route_regex_cache: Dict[str, re.Pattern] = {}  # route scope pattern -> compiled regex
+# Validator caches are keyed by schema_cache_key, so they stay valid across registry reloads
+_compiled: Dict[bytes, Optional[Callable[[Any], Any]]] = {}  # None: fastjsonschema rejected the schema
+_validator_cache: Dict[bytes, Draft202012Validator] = {}  # fallback for schemas fastjsonschema rejects
+
+
+def bump_store_gen():
+    global _store_gen
+    _store_gen += 1
+
+
+def schema_cache_key(schema: Dict[str, Any]) -> bytes:
+    # Hash of the canonical JSON form: equal schemas share a key, schemas changed by a reload get a new one
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+# fastjsonschema only implements drafts 04-07, and differs from Draft202012Validator in ways a keyword
+# scan cannot catch ($ref siblings, minContains, dependencies, ...). Schemas without $schema have always
+# been validated as 2020-12, so only schemas that explicitly declare one of those drafts are compiled.
+_FASTJSONSCHEMA_DRAFTS = re.compile(r'json-schema\.org/draft-0[467]/schema')
+
+
+def declares_fastjsonschema_draft(schema: Dict[str, Any]) -> bool:
+    declared = schema.get('$schema') if isinstance(schema, dict) else None
+    return isinstance(declared, str) and _FASTJSONSCHEMA_DRAFTS.search(declared) is not None
+
+
+def compiled_validator_for(key: bytes, schema: Dict[str, Any]) -> Optional[Callable[[Any], Any]]:
+    if key not in _compiled:
+        if not declares_fastjsonschema_draft(schema):
+            _compiled[key] = None  # validated through jsonschema instead
+            return None
+        try:
+            # jsonschema treats format as an annotation and never fills in defaults; match that
+            _compiled[key] = fastjsonschema.compile(schema, use_default=False, use_formats=False)
+        except fastjsonschema.JsonSchemaDefinitionException:
+            _compiled[key] = None  # validated through jsonschema instead
+    return _compiled[key]
 
 
 def load_registry():
-    global _registry
+    global _registry, _registry_keys_sorted
+    bump_store_gen()
     if os.path.exists(REGISTRY_PATH):
-        with open(REGISTRY_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(REGISTRY_PATH, 'rb') as f:
+            data = orjson.loads(f.read())
             _registry = data.get('components', {})
     else:
         _registry = {}
+    _registry_keys_sorted = tuple(sorted(_registry))
+    for entry in _registry.values():
+        if 'schema' in entry:
+            # Hashed once here; load_registry is the only place schemas change
+            entry['_schemaKey'] = schema_cache_key(entry['schema'])
+            compiled_validator_for(entry['_schemaKey'], entry['schema'])
+
+
+def index_doc(doc: ConfigDoc):
+    identity = (doc.tenant, doc.env, doc.componentKey)
+    _by_identity.setdefault(identity, []).append(doc)
+    _components_by_te.setdefault((doc.tenant, doc.env), set()).add(doc.componentKey)
+    latest = _latest.setdefault(identity, {})
+    key = (doc.scopeType, doc.scopeKey)
+    prev = latest.get(key)
+    if prev is None or doc.version > prev.version:
+        latest[key] = doc
+        if doc.scopeType is ScopeType.ROUTE:
+            _route_trie.setdefault(identity, PathTrie()).insert(doc)
 
 
 def load_store():
-    global _store
+    bump_store_gen()
+    _by_identity.clear()
+    _latest.clear()
+    _components_by_te.clear()
+    _route_trie.clear()
+    _unrecognized.clear()
     if os.path.exists(STORE_PATH):
-        with open(STORE_PATH, 'r', encoding='utf-8') as f:
-            raw = json.load(f)
-            _store = [ConfigDoc(**item) for item in raw]
-    else:
-        _store = []
+        with open(STORE_PATH, 'rb') as f:
+            raw = orjson.loads(f.read())
+            for item in raw:
+                try:
+                    doc = doc_from_dict(item)
+                except ValueError as e:
+                    logger.warning('Keeping stored doc for %r out of the index: %s', item.get('componentKey'), e)
+                    _unrecognized.append(item)
+                    continue
+                index_doc(doc)
 
 
 def save_store():
-    with open(STORE_PATH, 'w', encoding='utf-8') as f:
-        json.dump([asdict(d) for d in _store], f, indent=2)
+    # list() snapshots the index; request threads may add identities while this runs
+    items = [d._serialized for docs in list(_by_identity.values()) for d in docs]
+    items.extend(_unrecognized)
+    data = orjson.dumps(items, option=orjson.OPT_INDENT_2)
+    # Write to a temp file and swap it in so a crash never leaves a half-written store
+    tmp_path = STORE_PATH + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, STORE_PATH)
+
+
+def mark_dirty():
+    global _dirty
+    _dirty = True
+
+
+def flush_store():
+    global _dirty
+    # Flushes run in worker threads; a cancelled flusher's thread may still be writing at shutdown
+    with _flush_lock:
+        if not _dirty:
+            return
+        _dirty = False
+        try:
+            save_store()
+        except BaseException:
+            _dirty = True
+            raise
+
+
+async def flush_periodically():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            # off the event loop: serializing and writing the whole store would stall every request
+            await asyncio.to_thread(flush_store)
+        except Exception:
+            # still dirty; retried on the next tick
+            logger.exception('Store flush failed')
 
 
 load_registry()
@@ -87,18 +354,46 @@ load_store()
 def deep_merge(base: Any, override: Any) -> Any:
     if override is None:
         return base
-    if isinstance(base, dict) and isinstance(override, dict):
-        out = dict(base)
-        for k, v in override.items():
-            out[k] = deep_merge(base.get(k), v)
-        return out
-    # For arrays and primitives: replace
-    return override
+    if not (isinstance(base, dict) and isinstance(override, dict)):
+        # For arrays and primitives: replace
+        return override
+    # Iterative merge: copy each dict level once and fill it from a worklist of (target, override) pairs
+    out = dict(base)
+    stack = [(out, override)]
+    while stack:
+        dst, src = stack.pop()
+        for k, v in src.items():
+            if v is None:
+                # None keeps the base value
+                dst.setdefault(k, None)
+                continue
+            dv = dst.get(k)
+            if isinstance(dv, dict) and isinstance(v, dict):
+                nested = dst[k] = dict(dv)
+                stack.append((nested, v))
+            else:
+                dst[k] = v
+    return out
 
 
 def default_for(component_key: str) -> Dict[str, Any]:
+    # Returns the registry object itself; copy before handing it out
     entry = _registry.get(component_key)
-    return deepcopy(entry.get('default')) if entry and 'default' in entry else {}
+    return entry.get('default') if entry and 'default' in entry else {}
+
+
+def error_path(value: Any, parts: List[str]) -> List[Any]:
+    # fastjsonschema reports every path part as a string; turn array indices back into ints like jsonschema
+    path: List[Any] = []
+    node = value
+    for part in parts:
+        if isinstance(node, list) and part.isdigit():
+            path.append(int(part))
+            node = node[int(part)] if int(part) < len(node) else None
+        else:
+            path.append(part)
+            node = node.get(part) if isinstance(node, dict) else None
+    return path
 
 
 def validate_value(component_key: str, value: Dict[str, Any]) -> Optional[List[str]]:
@@ -106,65 +401,75 @@ def validate_value(component_key: str, value: Dict[str, Any]) -> Optional[List[s
     if not entry or 'schema' not in entry:
         return None  # no validation
     schema = entry['schema']
-    validator = Draft202012Validator(schema)
-    errors = sorted(validator.iter_errors(value), key=lambda e: e.path)
+    key = entry.get('_schemaKey')
+    if key is None:
+        # schema was not installed through load_registry; hash it here
+        key = schema_cache_key(schema)
+    compiled = compiled_validator_for(key, schema)
+    if compiled is not None:
+        try:
+            compiled(value)
+            return None
+        except fastjsonschema.JsonSchemaValueException as e:
+            return [f"{error_path(value, e.path[1:])}: {e.message}"]
+    validator = _validator_cache.get(key)
+    if validator is None:
+        Draft202012Validator.check_schema(schema)
+        validator = _validator_cache[key] = Draft202012Validator(schema)
+    # Report at most MAX_VALIDATION_ERRORS instead of walking the whole value for every error
+    errors = list(islice(validator.iter_errors(value), MAX_VALIDATION_ERRORS))
     if not errors:
         return None
+    errors.sort(key=lambda e: tuple(e.path))
     return [f"{list(e.path)}: {e.message}" for e in errors]
 
 
 def sort_scopes(scopes: List[ConfigDoc]) -> List[ConfigDoc]:
-    # Specificity: global < page (exact) < route (longer pattern is more specific) < page-instance (most specific)
-    def score(doc: ConfigDoc) -> Tuple[int, int]:
-        if doc.scopeType == 'global':
-            return (0, 0)
-        if doc.scopeType == 'page':
-            # exact match only; treat as medium specificity
-            return (1, len(doc.scopeKey))
-        if doc.scopeType == 'route':
-            # longer patterns considered more specific
-            return (2, len(doc.scopeKey))
-        if doc.scopeType == 'page-instance':
-            return (3, len(doc.scopeKey))
-        return (0, 0)
-    return sorted(scopes, key=score)
+    return sorted(scopes, key=attrgetter('_specificity'))
 
 
 def match_route(pattern: str, route: str) -> bool:
     # basic wildcard match: '/products/*' etc.
-    return fnmatch(route, pattern)
+    regex = _route_regex_cache.get(pattern)
+    if regex is None:
+        regex = _route_regex_cache[pattern] = re.compile(translate(pattern))
+    return regex.match(route) is not None
 
 
-def latest_versions_for(identity: Tuple[str, str, str]) -> List[ConfigDoc]:
-    tenant, env, component_key = identity
-    candidates = [d for d in _store if d.tenant == tenant and d.env == env and d.componentKey == component_key]
-    # Keep latest per (scopeType, scopeKey)
-    latest: Dict[Tuple[str, str], ConfigDoc] = {}
-    for d in candidates:
-        key = (d.scopeType, d.scopeKey)
-        prev = latest.get(key)
-        if prev is None or d.version > prev.version:
-            latest[key] = d
-    return list(latest.values())
+def latest_versions_for(identity: Identity) -> List[ConfigDoc]:
+    # Latest per (scopeType, scopeKey), maintained by index_doc
+    return list(_latest.get(identity, {}).values())
 
 
 def effective_for_component(tenant: str, env: str, component_key: str, route: Optional[str] = None, page: Optional[str] = None, instance: Optional[str] = None) -> Dict[str, Any]:
+    # Cached per store generation; results are shared between callers and must not be mutated
+    return _effective_cached(tenant, env, component_key, route, page, instance, _store_gen)
+
+
+@lru_cache(maxsize=4096)
+def _effective_cached(tenant: str, env: str, component_key: str, route: Optional[str], page: Optional[str], instance: Optional[str], gen: int) -> Dict[str, Any]:
     effective = default_for(component_key)
-    docs = latest_versions_for((tenant, env, component_key))
+    identity = (tenant, env, component_key)
+    docs = latest_versions_for(identity)
     # Apply global, then page (matching page id), then route (matching pattern), then page-instance (most specific)
-    globals_ = [d for d in docs if d.scopeType == 'global']
-    pages_ = [d for d in docs if d.scopeType == 'page' and page and d.scopeKey == page]
-    routes_ = [d for d in docs if d.scopeType == 'route' and route and match_route(d.scopeKey, route)]
+    globals_ = [d for d in docs if d.scopeType is ScopeType.GLOBAL]
+    pages_ = [d for d in docs if d.scopeType is ScopeType.PAGE and page and d.scopeKey == page]
+    trie = _route_trie.get(identity)
+    routes_ = trie.lookup(route) if trie and route else []  # already in precedence order
     insts_: List[ConfigDoc] = []
     if page and instance:
         inst_key = f"{page}#{instance}"
-        insts_ = [d for d in docs if d.scopeType == 'page-instance' and d.scopeKey == inst_key]
+        insts_ = [d for d in docs if d.scopeType is ScopeType.PAGE_INSTANCE and d.scopeKey == inst_key]
 
-    for d in sort_scopes(globals_):
+    if not (globals_ or pages_ or routes_ or insts_):
+        return deepcopy(effective)
+    # deep_merge copies every level it touches, so the registry default is never written to
+    # every global doc has specificity (0, 0), so sorting them would be a no-op
+    for d in globals_:
         effective = deep_merge(effective, d.value)
     for d in sort_scopes(pages_):
         effective = deep_merge(effective, d.value)
-    for d in sort_scopes(routes_):
+    for d in routes_:
         effective = deep_merge(effective, d.value)
     for d in sort_scopes(insts_):
         effective = deep_merge(effective, d.value)
@@ -174,12 +479,16 @@ def effective_for_component(tenant: str, env: str, component_key: str, route: Op
 
 def effective_all(tenant: str, env: str, route: Optional[str], page: Optional[str], instance: Optional[str]) -> Dict[str, Any]:
     # determine all known component keys from registry + store
-    keys = set(_registry.keys())
-    for d in _store:
-        if d.tenant == tenant and d.env == env:
-            keys.add(d.componentKey)
+    present = _components_by_te.get((tenant, env), set())
+    # registry keys are pre-sorted; only the store-only keys need sorting
+    keys = merge(_registry_keys_sorted, sorted(present.difference(_registry)))
     out: Dict[str, Any] = {}
-    for key in sorted(keys):
+    for key in keys:
+        if key not in present:
+            # no docs for this component: the result is a copy of the registry default whatever the
+            # route/page, so share one cached copy per store generation
+            out[key] = _effective_cached(tenant, env, key, None, None, None, _store_gen)
+            continue
         out[key] = effective_for_component(tenant, env, key, route=route, page=page, instance=instance)
     return out
 
@@ -187,40 +496,23 @@ def effective_all(tenant: str, env: str, route: Optional[str], page: Optional[st
 # API
 # -----------------------
 @app.get('/api/mn-config')
-def get_all_effective(
-    tenant: str = Query('default', description='Tenant key'),
-    env: str = Query('dev', description='Environment key'),
-    route: Optional[str] = Query(None, description='Optional current URL path'),
-    page: Optional[str] = Query(None, description='Optional page id'),
-    instance: Optional[str] = Query(None, description='Optional instance id for the given page (page-instance scope)'),
-):
+def get_all_effective(query: Annotated[EffectiveQuery, Query()]):
     """Get effective merged configuration for all components."""
-    result = effective_all(tenant, env, route, page, instance)
+    result = effective_all(query.tenant, query.env, query.route, query.page, query.instance)
     return result
 
 
 @app.get('/api/mn-config/{component_key}')
-def get_component_effective(
-    component_key: str,
-    tenant: str = Query('default', description='Tenant key'),
-    env: str = Query('dev', description='Environment key'),
-    route: Optional[str] = Query(None, description='Optional current URL path'),
-    page: Optional[str] = Query(None, description='Optional page id'),
-    instance: Optional[str] = Query(None, description='Optional instance id for the given page (page-instance scope)'),
-):
+def get_component_effective(component_key: str, query: Annotated[EffectiveQuery, Query()]):
     """Get effective merged configuration for a single component."""
-    result = effective_for_component(tenant, env, component_key, route=route, page=page, instance=instance)
+    result = effective_for_component(query.tenant, query.env, component_key, route=query.route, page=query.page, instance=query.instance)
     return result
 
 
 @app.get('/api/mn-config/history/{component_key}')
-def get_history(
-    component_key: str,
-    tenant: str = Query('default', description='Tenant key'),
-    env: str = Query('dev', description='Environment key'),
-):
+def get_history(component_key: str, query: Annotated[TenantEnvQuery, Query()]):
     """Get versioned history of config documents for a component (current tenant/env)."""
-    docs = [asdict(d) for d in _store if d.tenant == tenant and d.env == env and d.componentKey == component_key]
+    docs = [d._serialized for d in _by_identity.get((query.tenant, query.env, component_key), [])]
     # sort by version ascending
     docs.sort(key=lambda d: (d['scopeType'], d['scopeKey'], d['version']))
     return docs
@@ -231,14 +523,14 @@ def upsert_component(
     component_key: str,
     tenant_q: Optional[str] = Query(None, description='Tenant key (query param)'),
     env_q: Optional[str] = Query(None, description='Environment key (query param)'),
-    body: Dict[str, Any] = Body(..., description='Payload containing value and optional keys'),
+    body: UpsertBody = Body(..., description='Payload containing value and optional keys'),
 ):
     """Upsert (append) a new version for a component scope."""
-    tenant = body.get('tenant', tenant_q or 'default')
-    env = body.get('env', env_q or 'dev')
-    scope_type = body.get('scopeType', 'global')  # 'global' | 'route' | 'page' | 'page-instance'
-    scope_key = body.get('scopeKey', '*')
-    value = body.get('value', {})
+    tenant = body.tenant if body.tenant is not None else tenant_q or 'default'
+    env = body.env if body.env is not None else env_q or 'dev'
+    scope_type = ScopeType.from_wire(body.scopeType)
+    scope_key = body.scopeKey
+    value = body.value
 
     # Validate (optional if schema exists)
     errors = validate_value(component_key, value)
@@ -246,9 +538,15 @@ def upsert_component(
         # In FastAPI, raising HTTPException sets status and returns JSON
         raise HTTPException(status_code=400, detail={"error": "ValidationError", "details": errors})
 
+    # The store is written with orjson; reject what it cannot encode (e.g. ints beyond 64 bits) before indexing
+    try:
+        orjson.dumps(value)
+    except orjson.JSONEncodeError as e:
+        raise HTTPException(status_code=400, detail={"error": "ValidationError", "details": [f"[]: {e}"]})
+
     # Compute next version
-    existing = [d for d in _store if d.tenant == tenant and d.env == env and d.componentKey == component_key and d.scopeType == scope_type and d.scopeKey == scope_key]
-    next_version = max([d.version for d in existing], default=0) + 1
+    prev = _latest.get((tenant, env, component_key), {}).get((scope_type, scope_key))
+    next_version = prev.version + 1 if prev else 1
 
     doc = ConfigDoc(
         tenant=tenant,
@@ -259,11 +557,12 @@ def upsert_component(
         version=next_version,
         value=value,
         createdAt=time.time(),
-        createdBy=body.get('updatedBy', 'dev')
+        createdBy=body.updatedBy
     )
 
-    _store.append(doc)
-    save_store()
+    index_doc(doc)
+    bump_store_gen()
+    mark_dirty()
 
     return {"status": "ok", "version": next_version}
 
@@ -272,21 +571,28 @@ def upsert_component(
 @app.delete('/api/mn-config')
 def delete_all():
     """Delete all configuration documents (dev-only helper)."""
-    _store.clear()
-    save_store()
+    _by_identity.clear()
+    _latest.clear()
+    _components_by_te.clear()
+    _route_trie.clear()
+    _unrecognized.clear()
+    bump_store_gen()
+    mark_dirty()
     return {"status": "cleared"}
 
 
 @app.delete('/api/mn-config/{component_key}')
-def delete_component(
-    component_key: str,
-    tenant: str = Query('default', description='Tenant key'),
-    env: str = Query('dev', description='Environment key'),
-):
+def delete_component(component_key: str, query: Annotated[TenantEnvQuery, Query()]):
     """Delete all documents for a component under the current tenant/env (dev-only helper)."""
-    keep = [d for d in _store if not (d.tenant == tenant and d.env == env and d.componentKey == component_key)]
-    _store[:] = keep
-    save_store()
+    tenant, env = query.tenant, query.env
+    identity = (tenant, env, component_key)
+    _by_identity.pop(identity, None)
+    _latest.pop(identity, None)
+    _route_trie.pop(identity, None)
+    _unrecognized[:] = [i for i in _unrecognized if (i.get('tenant'), i.get('env'), i.get('componentKey')) != identity]
+    _components_by_te.get((tenant, env), set()).discard(component_key)
+    bump_store_gen()
+    mark_dirty()
     return {"status": "deleted"}
 
 
@@ -0,0 +1,51 @@
+import time
+from copy import deepcopy
+
+import pytest
+
+import main
+
+
+DEFAULT = {'color': 'red', 'size': {'w': 1, 'h': 2}, 'tags': ['a']}
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    monkeypatch.setattr(main, '_registry', {'btn': {'default': deepcopy(DEFAULT)}})
+    monkeypatch.setattr(main, '_registry_keys_sorted', ('btn',))
+    for name in ('_by_identity', '_latest', '_components_by_te', '_route_trie'):
+        monkeypatch.setattr(main, name, {})
+    main.bump_store_gen()
+
+
+def add_doc(scope_type, scope_key, value):
+    doc = main.ConfigDoc(
+        tenant='default', env='dev', componentKey='btn', scopeType=scope_type, scopeKey=scope_key,
+        version=1, value=value, createdAt=time.time(), createdBy='test',
+    )
+    main.index_doc(doc)
+    main.bump_store_gen()
+
+
+def test_merge_does_not_mutate_default_or_doc_values():
+    global_value = {'size': {'w': 9}, 'tags': ['b']}
+    route_value = {'size': {'h': 7}, 'color': None}
+    add_doc(main.ScopeType.GLOBAL, '*', global_value)
+    add_doc(main.ScopeType.ROUTE, '/p/*', route_value)
+
+    for _ in range(2):
+        main.bump_store_gen()  # bypass the effective-config cache
+        effective = main.effective_for_component('default', 'dev', 'btn', route='/p/x')
+        assert effective == {'color': 'red', 'size': {'w': 9, 'h': 7}, 'tags': ['b']}
+
+    assert main._registry['btn']['default'] == DEFAULT
+    assert global_value == {'size': {'w': 9}, 'tags': ['b']}
+    assert route_value == {'size': {'h': 7}, 'color': None}
+
+
+def test_default_is_copied_when_no_docs_apply():
+    for effective in (main.effective_for_component('default', 'dev', 'btn'),
+                      main.effective_all('default', 'dev', None, None, None)['btn']):
+        assert effective == DEFAULT
+        assert effective is not main._registry['btn']['default']
+        assert effective['size'] is not main._registry['btn']['default']['size']
@@ -0,0 +1,30 @@
+import orjson
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = tmp_path / 'config_store.json'
+    monkeypatch.setattr(main, 'STORE_PATH', str(path))
+    for name in ('_by_identity', '_latest', '_components_by_te', '_route_trie'):
+        monkeypatch.setattr(main, name, {})
+    monkeypatch.setattr(main, '_unrecognized', [])
+    return path
+
+
+def stored(scope_type, value):
+    return {'tenant': 'default', 'env': 'dev', 'componentKey': 'btn', 'scopeType': scope_type,
+            'scopeKey': '*', 'version': 1, 'value': value, 'createdAt': 0.0, 'createdBy': 'dev'}
+
+
+def test_unknown_scope_types_are_kept_out_of_the_index_but_saved(store_path):
+    unknown = stored('component', {'color': 'odd'})
+    store_path.write_bytes(orjson.dumps([unknown, stored('global', {'color': 'ok'})]))
+
+    main.load_store()
+    assert [d.scopeType for d in main.latest_versions_for(('default', 'dev', 'btn'))] == [main.ScopeType.GLOBAL]
+
+    main.save_store()
+    assert unknown in orjson.loads(store_path.read_bytes())
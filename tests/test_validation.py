@@ -0,0 +1,51 @@
+import pytest
+
+import main
+
+
+DRAFT_07 = 'http://json-schema.org/draft-07/schema#'
+
+
+@pytest.fixture
+def register(monkeypatch):
+    monkeypatch.setattr(main, '_registry', {})
+
+    def _register(schema):
+        main._registry['cmp'] = {'schema': schema, '_schemaKey': main.schema_cache_key(schema)}
+        return 'cmp'
+    return _register
+
+
+@pytest.mark.parametrize('schema, value', [
+    ({'$defs': {'b': {'type': 'object'}}, '$ref': '#/$defs/b', 'required': ['x']}, {}),
+    ({'type': 'object', 'properties': {'t': {'contains': {'type': 'integer'}, 'minContains': 2}}}, {'t': [1, 'a']}),
+    ({'type': 'object', 'dependentRequired': {'a': ['b']}}, {'a': 1}),
+])
+def test_undeclared_schemas_reject_like_draft_2020(register, schema, value):
+    assert main.validate_value(register(schema), value)
+
+
+@pytest.mark.parametrize('schema, value', [
+    ({'type': 'object', 'dependencies': {'a': ['b']}}, {'a': 1}),
+    ({'type': 'object', 'properties': {'t': {'prefixItems': [{'type': 'integer'}], 'items': False}}}, {'t': [1]}),
+    ({'type': 'object', 'properties': {'mail': {'type': 'string', 'format': 'email'}}}, {'mail': 'x'}),
+])
+def test_undeclared_schemas_accept_like_draft_2020(register, schema, value):
+    assert main.validate_value(register(schema), value) is None
+
+
+def test_only_declared_old_drafts_use_fastjsonschema(register):
+    undeclared = {'type': 'object'}
+    declared = {'$schema': DRAFT_07, 'type': 'object'}
+    assert main.compiled_validator_for(main.schema_cache_key(undeclared), undeclared) is None
+    assert main.compiled_validator_for(main.schema_cache_key(declared), declared) is not None
+
+
+def test_fastjsonschema_errors_keep_int_indices(register):
+    key = register({'$schema': DRAFT_07, 'type': 'object', 'properties': {'a': {'type': 'array', 'items': {'type': 'integer'}}}})
+    assert main.validate_value(key, {'a': [1, 'x']}) == ["['a', 1]: data.a[1] must be integer"]
+
+
+def test_schema_without_precomputed_key_is_validated(monkeypatch):
+    monkeypatch.setattr(main, '_registry', {'cmp': {'schema': {'type': 'object', 'required': ['x']}}})
+    assert main.validate_value('cmp', {}) == ["[]: 'x' is a required property"]